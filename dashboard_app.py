@@ -1,10 +1,16 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import firebase_admin
 from firebase_admin import credentials, firestore
 import numpy as np
+import itertools
+import io
+from concurrent.futures import ThreadPoolExecutor
+import os
+import glob
+import hashlib
+import tempfile
+import time
 from datetime import datetime
 import json
 
@@ -20,78 +26,661 @@ st.set_page_config(
 st.title("🎓 Faculty Evaluation Analytics Dashboard")
 st.markdown("### Comprehensive Performance Insights & Visualizations")
 
+# ---------------------------------------------------------
+# SHARED STYLES
+# ---------------------------------------------------------
+@st.cache_resource
+def dashboard_css():
+    """Stylesheet for the HTML cards, built once and referenced by class name"""
+    return """<style>
+.narrative-card{background-color:#f8f9fa;padding:20px;border-radius:10px;border-left:5px solid var(--tone);}
+.narrative-card h4{color:var(--tone);margin-top:0;}
+.narrative-card p{font-size:16px;line-height:1.6;color:#333;}
+.test-card{padding:15px;border-radius:10px;border-left:5px solid var(--tier);margin:10px 0;contain:layout style;}
+.test-card .row{display:flex;justify-content:space-between;align-items:center;}
+.test-card h4{color:var(--tier);margin:0;}
+.test-card .score{margin:5px 0;font-size:18px;font-weight:bold;}
+.test-card .score span,.test-card .icon{color:var(--tier);}
+.test-card .icon{font-size:24px;text-align:right;}
+.test-card .insight{margin:10px 0;color:#666;}
+.tier-excellent{--tier:#4CAF50;background-color:#f0fff0;}
+.tier-good{--tier:#2196F3;background-color:#f0f8ff;}
+.tier-average{--tier:#FF9800;background-color:#fff8f0;}
+.tier-needs-improvement{--tier:#F44336;background-color:#fff0f0;}
+.action-plan{background:linear-gradient(135deg,#667eea 0%,#764ba2 100%);color:white;padding:20px;border-radius:10px;}
+.action-plan h4{color:white;margin-top:0;}
+.rec-card{background-color:rgba(255,255,255,0.2);padding:15px;border-radius:8px;margin:10px 0;contain:layout style;}
+.rec-card .row{display:flex;justify-content:space-between;align-items:start;}
+.rec-card .icon{font-size:24px;margin-right:10px;}
+.rec-card .body{flex-grow:1;}
+.rec-card h5{color:white;margin:0 0 5px 0;}
+.rec-card p{color:rgba(255,255,255,0.9);margin:0;font-size:14px;}
+.rec-card .priority{color:white;padding:2px 8px;border-radius:12px;font-size:12px;}
+.priority-high{background-color:#FF6B6B;}
+.priority-medium{background-color:#FFA726;}
+.priority-low{background-color:#66BB6A;}
+.metric-row{display:flex;gap:1rem;margin-bottom:1rem;}
+.metric-tile{flex:1;}
+.metric-tile .label{font-size:14px;color:rgba(49,51,63,0.6);}
+.metric-tile .value{font-size:2.25rem;line-height:1.4;}
+.growth-grid{display:grid;grid-template-columns:repeat(3,1fr);gap:1rem;}
+.growth-card{text-align:center;padding:15px;background-color:#e8f4f8;border-radius:10px;}
+.growth-card .icon{font-size:24px;}
+</style>"""
+
+# Streamlit drops elements that are not re-sent, so the cached sheet is emitted every run
+st.markdown(dashboard_css(), unsafe_allow_html=True)
+
+# Growth Pathway cards, laid out by .growth-grid and filled with one format() call
+GROWTH_PATHWAY_TEMPLATE = """
+<div class='growth-grid'>
+<div class='growth-card'>
+<div class='icon'>🎯</div>
+<h4>Immediate Focus</h4>
+<p><b>{focus_area}</b><br>Build foundational strength</p>
+</div>
+<div class='growth-card'>
+<div class='icon'>🚀</div>
+<h4>Next Phase</h4>
+<p><b>{development_area}</b><br>Develop advanced capabilities</p>
+</div>
+<div class='growth-card'>
+<div class='icon'>⭐</div>
+<h4>Long-term Goal</h4>
+<p><b>{mastery_goal}</b><br>Achieve comprehensive mastery</p>
+</div>
+</div>
+"""
+
+# One per-test performance card; tier drives the .tier-* colours
+TEST_CARD_TEMPLATE = """
+<div class='test-card tier-{tier}'>
+<div class='row'>
+<div>
+<h4>{icon} {name}</h4>
+<p class='score'>Score: <span>{score}</span> ({level})</p>
+</div>
+<div class='icon'>{icon}</div>
+</div>
+<p class='insight'>{insight}</p>
+</div>
+"""
+
+# ---------------------------------------------------------
+# PLOTLY
+# ---------------------------------------------------------
+@st.cache_resource
+def load_plotly():
+    """Import Plotly after the page header is sent, once per server process"""
+    import plotly.express as px
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    return px, go, make_subplots
+
+px, go, make_subplots = load_plotly()
+
 # ---------------------------------------------------------
 # FIREBASE INIT
 # ---------------------------------------------------------
-if not firebase_admin._apps:
-    try:
-        if "firebase" in st.secrets:
-            cfg = dict(st.secrets["firebase"])
-        else:
-            with open("firebase_key.json") as f:
-                cfg = json.load(f)
-        cred = credentials.Certificate(cfg)
-        firebase_admin.initialize_app(cred)
-    except Exception as e:
-        st.error(f"Firebase init failed: {e}")
-        st.stop()
+@st.cache_resource
+def get_db():
+    """One Firestore client per server process, so its gRPC channel and token survive reruns"""
+    if not firebase_admin._apps:
+        try:
+            if "firebase" in st.secrets:
+                cfg = dict(st.secrets["firebase"])
+            else:
+                with open("firebase_key.json") as f:
+                    cfg = json.load(f)
+            cred = credentials.Certificate(cfg)
+            firebase_admin.initialize_app(cred)
+        except Exception as e:
+            st.error(f"Firebase init failed: {e}")
+            st.stop()
+    return firestore.client()
 
-db = firestore.client()
+db = get_db()
 
 # ---------------------------------------------------------
 # LOAD AND PROCESS DATA
 # ---------------------------------------------------------
-@st.cache_data
-def load_all_evaluations():
-    """Load all student evaluations from Firestore - include partially evaluated students"""
+EVALUATION_FIELDS = ['auto_mcq', 'auto_likert', 'manual_total', 'final_total', 'grand_total']
+
+# Server-side field mask: only what the dashboard reads, never the bulky Responses arrays.
+# The two write-time fields are not kept in the frame; they set the incremental-load watermarks.
+LOADED_FIELDS = ['Roll', 'Section'] + [f"Evaluation.{field}" for field in EVALUATION_FIELDS] + [
+    'Evaluation.evaluated_at', 'Timestamp'
+]
+
+# Fallback document-ID split points for the parallel load, used when Firestore cannot partition
+# the collection itself. The first and last shards are open-ended, so every document lands in
+# exactly one shard whatever its ID looks like.
+SHARD_BOUNDARIES = ['2', '4', '6', '8', 'A', 'N', 'a', 'n']
+LOAD_WORKERS = 8
+
+def shard_queries(collection):
+    """Projected queries covering the collection in contiguous document-ID ranges"""
+    bounds = [None] + SHARD_BOUNDARIES + [None]
+    for lower, upper in zip(bounds, bounds[1:]):
+        query = collection.select(LOADED_FIELDS)
+        if lower is not None:
+            query = query.where("__name__", ">=", collection.document(lower))
+        if upper is not None:
+            query = query.where("__name__", "<", collection.document(upper))
+        yield query
+
+def partition_queries(collection):
+    """Projected queries over Firestore's own evenly sized partitions, or [] if unavailable"""
+    # Document IDs start with the roll number, so fixed split points can leave most shards
+    # empty; the partition API picks cursors from the actual key distribution instead.
+    # Partitions only exist for collection groups, so they also span any nested subcollection
+    # sharing this name; fetch_shard drops those documents to keep the top-level collection.
     try:
-        docs = db.collection("student_responses").stream()
-        
-        students_data = []
-        
-        for doc in docs:
-            data = doc.to_dict()
-            roll_number = data.get('Roll', '').strip()
-            section = data.get('Section', '').strip()
-            
-            if not roll_number or roll_number == 'Unknown':
-                continue
-                
-            evaluation = data.get("Evaluation", {})
-            
-            # Include ALL documents, but mark evaluation status
-            student_info = {
-                'roll_number': roll_number,
-                'section': section,
-                'auto_mcq': evaluation.get('auto_mcq', 0),
-                'auto_likert': evaluation.get('auto_likert', 0),
-                'manual_total': evaluation.get('manual_total', 0),
-                'final_total': evaluation.get('final_total', 0),
-                'grand_total': evaluation.get('grand_total', 0),
-                'doc_id': doc.id,
-                'is_fully_evaluated': bool(evaluation)  # Track evaluation status
-            }
-            students_data.append(student_info)
+        partitions = list(db.collection_group(collection.id).get_partitions(LOAD_WORKERS))
+    except Exception:
+        return []
+    if len(partitions) < 2:
+        return []
+    return [partition.query().select(LOADED_FIELDS) for partition in partitions]
+
+def fetch_shard(query):
+    """Stream one shard and decode its top-level documents inside the worker thread"""
+    return [(doc.id, doc.to_dict()) for doc in query.stream() if doc.reference.parent.parent is None]
+
+# Cheap change detector for the collection: document count plus the newest evaluation and
+# submission writes. The loader is keyed on it, so data is only re-read after something changed.
+VERSION_TTL_SECONDS = 30
+
+@st.cache_data(ttl=VERSION_TTL_SECONDS, show_spinner=False)
+def collection_version():
+    """Version string for student_responses, or None if it cannot be determined"""
+    try:
+        collection = db.collection("student_responses")
+        doc_count = collection.count().get()[0][0].value
+        latest_writes = []
+        for field in ("Evaluation.evaluated_at", "Timestamp"):
+            newest = collection.order_by(field, direction=firestore.Query.DESCENDING).select([field]).limit(1)
+            latest_writes += [str(doc.update_time) for doc in newest.stream()]
+        return "|".join([str(doc_count)] + latest_writes)
+    except Exception:
+        return None  # Fall back to the refresh button / snapshot TTL
+
+# On-disk snapshot shared by every worker/session on this host, one file per collection version
+SNAPSHOT_DIR = tempfile.gettempdir()
+SNAPSHOT_PREFIX = "evals_cache"
+# A snapshot matching the current collection version stays valid much longer than one loaded
+# while the version was unknown; the long cap only guards against writes the version misses.
+SNAPSHOT_TTL_SECONDS = 300
+VERSIONED_SNAPSHOT_TTL_SECONDS = 24 * 60 * 60
+
+def snapshot_paths(version):
+    """Snapshot parquet file and its watermark sidecar for a collection version"""
+    digest = hashlib.sha1(str(version).encode()).hexdigest()[:12]
+    base = os.path.join(SNAPSHOT_DIR, f"{SNAPSHOT_PREFIX}_{digest}")
+    return f"{base}.parquet", f"{base}.json"
+
+def read_snapshot(version):
+    """Return the snapshot for this version if it is younger than the TTL, otherwise None"""
+    path, _ = snapshot_paths(version)
+    ttl = SNAPSHOT_TTL_SECONDS if version is None else VERSIONED_SNAPSHOT_TTL_SECONDS
+    try:
+        if time.time() - os.path.getmtime(path) < ttl:
+            return pd.read_parquet(path)
+    except Exception:
+        pass  # Missing or unreadable snapshot - fall back to Firestore
+    return None
+
+def read_latest_snapshot():
+    """Newest snapshot of any version with its watermarks, as (df, watermarks), or None if none is young enough"""
+    try:
+        path = max(glob.glob(os.path.join(SNAPSHOT_DIR, f"{SNAPSHOT_PREFIX}_*.parquet")), key=os.path.getmtime)
+        with open(f"{path[:-len('.parquet')]}.json") as f:
+            watermarks = json.load(f)
+        # Aged on the last full read, not the file: every merge rewrites the file, and writes the
+        # watermarks miss (console edits, late grand_total updates) only go away on a full read
+        if time.time() - watermarks['full_load_at'] >= VERSIONED_SNAPSHOT_TTL_SECONDS:
+            return None
+        return pd.read_parquet(path), watermarks
+    except Exception:
+        return None  # No usable snapshot - do a full load
+
+def write_snapshot(df, version, watermarks):
+    """Persist the loaded frame and its watermarks; temp files first so readers never see partial files"""
+    path, marks_path = snapshot_paths(version)
+    try:
+        tmp_suffix = f".{os.getpid()}.tmp"
+        with open(marks_path + tmp_suffix, "w") as f:
+            json.dump(watermarks, f)
+        df.to_parquet(path + tmp_suffix, compression='zstd', index=False)
+        os.replace(marks_path + tmp_suffix, marks_path)
+        os.replace(path + tmp_suffix, path)
+        delete_snapshot(keep=(path, marks_path))  # Older versions are never read again
+    except Exception as e:
+        st.sidebar.warning(f"Could not write data snapshot: {e}")
+
+def delete_snapshot(keep=()):
+    """Drop on-disk snapshots and sidecars (all but `keep`) so the next load goes back to Firestore"""
+    for path in glob.glob(os.path.join(SNAPSHOT_DIR, f"{SNAPSHOT_PREFIX}_*")):
+        if path not in keep and not path.endswith(".tmp"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+def score_column(values):
+    """Scores as a compact numeric array: narrowest int, or float64 when NaN/fractions appear"""
+    # Floats stay float64: float32 noise surfaces in rounded scores and stats (21.600000381...)
+    numeric = pd.to_numeric(values, errors='coerce', downcast='unsigned')
+    if numeric.dtype.kind == 'i':  # Negative values rule out unsigned
+        numeric = pd.to_numeric(numeric, downcast='integer')
+    return numeric
+
+def listed_roll(data):
+    """Stripped roll number of a document the dashboard lists, or None for blank/'Unknown' rolls"""
+    roll_number = data.get('Roll', '').strip()
+    return roll_number if roll_number and roll_number != 'Unknown' else None
+
+def unlisted_ids(docs):
+    """IDs of the documents build_frame drops, so row counts can be checked against the collection"""
+    return [doc_id for doc_id, data in docs if listed_roll(data) is None]
+
+def watermarks_of(docs, watermarks=None):
+    """Newest evaluated_at (ISO string) and submission Timestamp seen in docs, merged into watermarks"""
+    # Legacy/string values are skipped: they cannot be compared or queried as timestamps
+    marks = dict(watermarks or {'evaluated_at': None, 'Timestamp': None})
+    for _, data in docs:
+        evaluated_at = (data.get("Evaluation") or {}).get('evaluated_at')
+        if isinstance(evaluated_at, datetime) and (marks['evaluated_at'] is None or evaluated_at.isoformat() > marks['evaluated_at']):
+            marks['evaluated_at'] = evaluated_at.isoformat()
+        submitted = data.get('Timestamp')
+        if isinstance(submitted, str) and (marks['Timestamp'] is None or submitted > marks['Timestamp']):
+            marks['Timestamp'] = submitted
+    return marks
+
+def build_frame(docs):
+    """Typed evaluation frame from (doc_id, data) pairs - include partially evaluated students"""
+    # One flat tuple per kept document; ALL documents are included, with their evaluation status
+    rows = [
+        (
+            roll_number,
+            data.get('Section', '').strip(),
+            evaluation.get('auto_mcq', 0),
+            evaluation.get('auto_likert', 0),
+            evaluation.get('manual_total', 0),
+            evaluation.get('final_total', 0),
+            evaluation.get('grand_total', 0),
+            doc_id,
+            bool(evaluation)
+        )
+        for doc_id, data in docs
+        if (roll_number := listed_roll(data)) is not None
+        for evaluation in (data.get("Evaluation", {}),)
+    ]
+    
+    if not rows:
+        return pd.DataFrame()
+    
+    # Transpose once into columns
+    rolls, sections, mcq, likert, manual, final, grand, doc_ids, evaluated = zip(*rows)
+    
+    # Rolls and tests drive every filter/groupby/pivot - compare and group on integer codes, not strings.
+    return pd.DataFrame({
+        'roll_number': pd.Categorical(rolls),
+        'section': pd.Categorical(sections),
+        'auto_mcq': score_column(mcq),
+        'auto_likert': score_column(likert),
+        'manual_total': score_column(manual),
+        'final_total': score_column(final),
+        'grand_total': score_column(grand),
+        'doc_id': list(doc_ids),
+        'is_fully_evaluated': np.array(evaluated, dtype=bool)
+    })
+
+def fetch_changes(collection, watermarks):
+    """Documents written at or after the watermarks, plus every document of an affected roll"""
+    # >= rather than >: second-resolution Timestamps can tie; re-reading a doc is harmless
+    evaluated = fetch_shard(collection.select(LOADED_FIELDS).where(
+        "Evaluation.evaluated_at", ">=", datetime.fromisoformat(watermarks['evaluated_at'])
+    ))
+    submitted = fetch_shard(collection.select(LOADED_FIELDS).where("Timestamp", ">=", watermarks['Timestamp']))
+    changed = dict(evaluated + submitted)
+    # Saving an evaluation rewrites grand_total on all of that student's documents
+    rolls = sorted({data['Roll'] for _, data in evaluated if data.get('Roll')})
+    for start in range(0, len(rolls), 30):  # Firestore caps "in" at 30 values
+        changed.update(fetch_shard(collection.select(LOADED_FIELDS).where("Roll", "in", rolls[start:start + 30])))
+    return list(changed.items())
+
+def merge_changes(base, changes):
+    """base with every changed document's row replaced by its fresh version"""
+    fresh = build_frame(changes)
+    merged = pd.concat(
+        [base[~base['doc_id'].isin([doc_id for doc_id, _ in changes])], fresh],
+        ignore_index=True
+    ).sort_values('doc_id', ignore_index=True)
+    # Re-derive the compact dtypes the concat may have widened
+    for column in ('roll_number', 'section'):
+        merged[column] = pd.Categorical(merged[column].astype(object))
+    for column in EVALUATION_FIELDS:
+        merged[column] = score_column(merged[column])
+    return merged
+
+# Shared as one read-only object per version: cache_data would unpickle a fresh copy on every
+# rerun. Nothing below mutates df - filtering always produces a new frame.
+@st.cache_resource(max_entries=2)
+def load_all_evaluations(version):
+    """Load all student evaluations, from a snapshot, an incremental update, or a full Firestore read"""
+    snapshot = read_snapshot(version)
+    if snapshot is not None:
+        return snapshot
+    
+    collection = db.collection("student_responses")
+    
+    # Incremental: re-read only what changed since the newest snapshot. Deletes are caught by
+    # checking listed + unlisted documents against the count the version was built from.
+    latest = read_latest_snapshot()
+    if latest is not None and version is not None:
+        base, watermarks = latest
+        if watermarks.get('evaluated_at') and watermarks.get('Timestamp') and 'unlisted' in watermarks:
+            try:
+                changes = fetch_changes(collection, watermarks)
+                df = merge_changes(base, changes)
+                changed_ids = {doc_id for doc_id, _ in changes}
+                unlisted = (set(watermarks['unlisted']) - changed_ids) | set(unlisted_ids(changes))
+                if len(df) + len(unlisted) == int(version.split("|", 1)[0]):
+                    marks = watermarks_of(changes, watermarks)  # Carries full_load_at forward unchanged
+                    marks['unlisted'] = sorted(unlisted)
+                    write_snapshot(df, version, marks)
+                    return df
+                # Count mismatch: documents were deleted since the base - fall through to a full load
+            except Exception as e:
+                st.sidebar.warning(f"Incremental refresh failed, reading everything instead: {e}")
+    
+    try:
+        # Network-bound: stream the ID-range shards concurrently, keeping document-ID order
+        with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as pool:
+            queries = partition_queries(collection) or list(shard_queries(collection))
+            shards = list(pool.map(fetch_shard, queries))
         
-        # Debug info
-        if students_data:
-            unique_students = len(set([s['roll_number'] for s in students_data]))
-            evaluated_docs = len([s for s in students_data if s['is_fully_evaluated']])
-            st.sidebar.info(f"📊 Loaded {len(students_data)} test records from {unique_students} students ({evaluated_docs} evaluated)")
+        docs = list(itertools.chain.from_iterable(shards))
+        df = build_frame(docs)
+        if df.empty:
+            return df
         
-        return pd.DataFrame(students_data)
+        # Snapshot bookkeeping is optional - a failure here must not discard the loaded frame
+        try:
+            marks = watermarks_of(docs)
+            marks['unlisted'] = unlisted_ids(docs)
+            marks['full_load_at'] = time.time()
+        except Exception as e:
+            st.sidebar.warning(f"Could not record snapshot watermarks: {e}")
+        else:
+            write_snapshot(df, version, marks)
+        return df
         
     except Exception as e:
         st.error(f"Error loading data: {e}")
         return pd.DataFrame()
 
 # Load data
-df = load_all_evaluations()
+data_version = collection_version()
+df = load_all_evaluations(data_version)
 
 if df.empty:
     st.warning("No evaluation data found. Please evaluate some students first.")
     st.stop()
 
+# ---------------------------------------------------------
+# DISPLAY CONSTANTS
+# ---------------------------------------------------------
+# Narrative tone -> (accent colour, card title)
+NARRATIVE_TONES = {
+    "balanced": ("#4CAF50", "🎉 Exceptional All-Round Performance"),
+    "adaptable": ("#2196F3", "🚀 Adaptability Strength with Growth Opportunities"),
+    "foundational": ("#FF9800", "📚 Foundational Development Focus Needed")
+}
+
+# Test average tiers: [40, 60, 80) boundaries, left-closed; colours live in the .tier-* CSS classes
+TIER_EDGES = np.array([40, 60, 80])
+TIER_LABELS = np.array(["needs-improvement", "average", "good", "excellent"])
+TIER_STYLE = {
+    "excellent": ("Excellent", "🎯"),
+    "good": ("Good", "✅"),
+    "average": ("Average", "⚠️"),
+    "needs-improvement": ("Needs Improvement", "🚨")
+}
+
+# Trend chart: students plotted by default, and the count above which a warning is shown
+TREND_DEFAULT_STUDENTS = 5
+TREND_WARN_STUDENTS = 20
+
+# Skill mastery chart: (category, max possible score, bar colour), in avg_mcq/avg_likert/avg_manual order
+SKILL_META = (
+    ('Analytical', 30, '#FF6B6B'),
+    ('Adaptability', 40, '#4ECDC4'),
+    ('Communication', 30, '#45B7D1'),
+)
+
+# ---------------------------------------------------------
+# RECOMMENDATION RULES
+# ---------------------------------------------------------
+# (applies(avg_mcq, avg_likert, avg_manual), title, icon, priority, (individual details, group details))
+RECOMMENDATION_RULES = (
+    (lambda mcq, likert, manual: mcq < 15,
+     "Strengthen Analytical Thinking", "🧠", "High",
+     ("Practice logical reasoning and problem-solving exercises",
+      "Students should practice logical reasoning exercises")),
+    (lambda mcq, likert, manual: likert < 15,
+     "Develop Adaptability", "🔄", "High",
+     ("Scenario-based learning and flexibility training",
+      "Students need scenario-based learning practice")),
+    (lambda mcq, likert, manual: 15 <= likert < 20,
+     "Develop Adaptability", "🔄", "Medium",
+     ("Scenario-based learning and flexibility training",
+      "Students need scenario-based learning practice")),
+    (lambda mcq, likert, manual: manual < 10,
+     "Enhance Communication", "✍️", "High",
+     ("Structured writing practice and expression exercises",
+      "Students need structured writing practice")),
+    # Positive reinforcement for strengths
+    (lambda mcq, likert, manual: likert >= 20,
+     "Leverage Adaptability Strength", "⭐", "Low",
+     ("Apply learning agility to other skill areas",
+      "Students can apply learning agility to other areas")),
+    (lambda mcq, likert, manual: mcq >= 15,
+     "Build on Analytical Skills", "📊", "Low",
+     ("Tackle more complex problem-solving challenges",
+      "Students can tackle complex problem-solving")),
+)
+
+# Per-test insight line: (test name fragment, score column, threshold,
+# (individual, group) text when >= threshold, (individual, group) text otherwise)
+TEST_INSIGHT_RULES = (
+    ("Aptitude", 'auto_mcq', 15,
+     ("• Demonstrates strong analytical thinking and problem-solving skills",
+      "• Strong analytical thinking and problem-solving skills demonstrated"),
+     ("• Could benefit from strengthening logical reasoning and quantitative analysis",
+      "• Opportunity to strengthen logical reasoning and quantitative analysis")),
+    ("Adaptability", 'auto_likert', 20,
+     ("• Shows excellent learning agility and flexibility in new situations",
+      "• Excellent learning agility and flexibility in new situations"),
+     ("• Should develop resilience and adaptability to changing circumstances",
+      "• Develop resilience and adaptability to changing circumstances")),
+    ("Communication Skills - Objective", 'auto_mcq', 10,
+     ("• Has a solid foundation in language fundamentals and comprehension",
+      "• Solid foundation in language fundamentals and comprehension"),
+     ("• Should build vocabulary and grammar fundamentals for better expression",
+      "• Build vocabulary and grammar fundamentals for better expression")),
+    ("Communication Skills - Descriptive", 'manual_total', 15,
+     ("• Demonstrates effective written expression and structured communication",
+      "• Effective written expression and structured communication"),
+     ("• Should practice organizing thoughts and expressing ideas clearly in writing",
+      "• Practice organizing thoughts and expressing ideas clearly in writing")),
+)
+
+# Used when no rule applies
+DEFAULT_RECOMMENDATION = (
+    {"title": "Maintain Current Progress", "icon": "✅", "priority": "Low",
+     "details": "Continue with current learning strategies"},
+    {"title": "Maintain Current Progress", "icon": "✅", "priority": "Low",
+     "details": "Students should continue current strategies"},
+)
+
+# ---------------------------------------------------------
+# PERFORMANCE NARRATIVE
+# ---------------------------------------------------------
+# st.cache_data rather than lru_cache: the script re-executes on every rerun, which would
+# rebuild an lru_cache and empty it each time
+NARRATIVE_CACHE_ENTRIES = 64
+
+@st.cache_data(show_spinner=False, max_entries=NARRATIVE_CACHE_ENTRIES)
+def performance_narrative(student_name, strong_flags, avg_mcq, avg_likert, avg_manual, overall_avg):
+    """Tone key and narrative text for the executive summary - student_name None gives the group wording"""
+    all_strong = all(strong_flags)
+    likert_strong = strong_flags[1]
+    if student_name is not None:
+        # SINGULAR LANGUAGE FOR INDIVIDUAL STUDENT
+        if all_strong:
+            narrative = f"""
+            <b>{student_name}</b> is demonstrating <b>excellent balanced performance</b> across all assessment domains with an overall average of {overall_avg:.1f}. 
+            The strong adaptability score ({avg_likert:.1f}) indicates great learning agility, while solid analytical ({avg_mcq:.1f}) 
+            and communication skills ({avg_manual:.1f}) show well-rounded development.
+            """
+            tone = "balanced"
+        elif likert_strong:
+            narrative = f"""
+            <b>{student_name}</b> shows <b>strong adaptability and learning agility</b> ({avg_likert:.1f}) with an overall score of {overall_avg:.1f}. 
+            While adaptability is a key strength, there are opportunities to enhance analytical thinking ({avg_mcq:.1f}) 
+            and communication skills ({avg_manual:.1f}) to achieve more balanced performance.
+            """
+            tone = "adaptable"
+        else:
+            narrative = f"""
+            With an overall score of {overall_avg:.1f}, <b>{student_name}</b> is building foundational skills across adaptability ({avg_likert:.1f}), 
+            analytical thinking ({avg_mcq:.1f}), and communication ({avg_manual:.1f}). Targeted focus on conceptual understanding 
+            and skill application can drive significant improvement.
+            """
+            tone = "foundational"
+    else:
+        # PLURAL LANGUAGE FOR MULTIPLE STUDENTS
+        if all_strong:
+            narrative = f"""
+            Students are demonstrating <b>excellent balanced performance</b> across all assessment domains with an overall average of {overall_avg:.1f}. 
+            The strong adaptability scores ({avg_likert:.1f}) indicate great learning agility, while solid analytical ({avg_mcq:.1f}) 
+            and communication skills ({avg_manual:.1f}) show well-rounded development.
+            """
+            tone = "balanced"
+        elif likert_strong:
+            narrative = f"""
+            Students show <b>strong adaptability and learning agility</b> ({avg_likert:.1f}) with an overall score of {overall_avg:.1f}. 
+            While adaptability is a key strength, there are opportunities to enhance analytical thinking ({avg_mcq:.1f}) 
+            and communication skills ({avg_manual:.1f}) to achieve more balanced performance.
+            """
+            tone = "adaptable"
+        else:
+            narrative = f"""
+            With an overall score of {overall_avg:.1f}, students are building foundational skills across adaptability ({avg_likert:.1f}), 
+            analytical thinking ({avg_mcq:.1f}), and communication ({avg_manual:.1f}). Targeted focus on conceptual understanding 
+            and skill application can drive significant improvement.
+            """
+            tone = "foundational"
+    return tone, narrative
+
+# ---------------------------------------------------------
+# INSIGHT AGGREGATIONS
+# ---------------------------------------------------------
+# The derived aggregates below are cached on the filter selection plus the collection version
+# df was loaded for, so a reload after a Firestore change never serves stale aggregates.
+# Every new selection or data version adds an entry, so each of these caches keeps only the
+# most recent ones on a long-running server.
+SELECTION_CACHE_ENTRIES = 32
+SCORE_COLUMNS = ['auto_mcq', 'auto_likert', 'manual_total', 'final_total']
+
+def category_mask(frame, column, values):
+    """Boolean row mask for frame[column] in values, compared on the categorical codes"""
+    codes = frame[column].cat.categories.get_indexer(values)
+    return np.isin(frame[column].cat.codes.to_numpy(), codes[codes >= 0])
+
+def grouped_or_flat(frame, key, sort=True, **named_aggs):
+    """frame.groupby(key).agg(**named_aggs), answered with whole-column reductions when only one key value is present"""
+    if frame[key].nunique() == 1:
+        row = {name: frame[col].agg(func) for name, (col, func) in named_aggs.items()}
+        return pd.DataFrame([row], index=pd.Index([frame[key].iloc[0]], name=key))
+    return frame.groupby(key, observed=True, sort=sort).agg(**named_aggs)
+
+@st.cache_data(show_spinner=False, max_entries=SELECTION_CACHE_ENTRIES)
+def compute_insights(selection_key, _frame):
+    """Average scores and every per-test view the page shows, cached on selection_key"""
+    # One column-wise reduction for the four averages, one groupby feeding all per-test views
+    means = _frame[SCORE_COLUMNS].mean()
+    section_agg = grouped_or_flat(
+        _frame, 'section',
+        final_total=('final_total', 'mean'),
+        auto_mcq=('auto_mcq', 'mean'),
+        auto_likert=('auto_likert', 'mean'),
+        manual_total=('manual_total', 'mean'),
+        mcq_sum=('auto_mcq', 'sum'),
+        likert_sum=('auto_likert', 'sum'),
+        manual_sum=('manual_total', 'sum'),
+        final_median=('final_total', 'median'),
+        final_std=('final_total', 'std'),
+        final_min=('final_total', 'min'),
+        final_max=('final_total', 'max')
+    )
+    test_analysis = section_agg[['final_total', 'auto_mcq', 'auto_likert', 'manual_total']].round(1)
+    # Performance tier, its label and icon as columns, bucketed once per selection
+    averages = test_analysis['final_total'].to_numpy(dtype=float)
+    tier_idx = np.searchsorted(TIER_EDGES, averages, side='right')
+    tier_idx[np.isnan(averages)] = 0  # No average yet reads as needs-improvement
+    tier = pd.Series(TIER_LABELS[tier_idx], index=test_analysis.index)
+    test_analysis = test_analysis.assign(
+        tier=tier,
+        level=tier.map({name: level for name, (level, _) in TIER_STYLE.items()}),
+        icon=tier.map({name: icon for name, (_, icon) in TIER_STYLE.items()})
+    )
+    section_totals = section_agg[['mcq_sum', 'likert_sum', 'manual_sum']].rename(
+        columns={'mcq_sum': 'auto_mcq', 'likert_sum': 'auto_likert', 'manual_sum': 'manual_total'}
+    )
+    summary_stats = section_agg[['final_total', 'final_median', 'final_std', 'final_min', 'final_max']].rename(
+        columns={'final_total': 'mean', 'final_median': 'median', 'final_std': 'std', 'final_min': 'min', 'final_max': 'max'}
+    ).round(2)
+    # Plain Python floats keep the many threshold compares downstream off numpy scalar dispatch
+    avg_mcq = float(means['auto_mcq'])
+    avg_likert = float(means['auto_likert'])
+    avg_manual = float(means['manual_total'])
+    # Strength flags in (analytical, adaptability, communication) order
+    strong_flags = (avg_mcq >= 15, avg_likert >= 20, avg_manual >= 10)
+    return {
+        'avg_mcq': avg_mcq,
+        'avg_likert': avg_likert,
+        'avg_manual': avg_manual,
+        'overall_avg': float(means['final_total']),
+        'strong_flags': strong_flags,
+        'strong_areas': sum(strong_flags),
+        'test_analysis': test_analysis,
+        'section_totals': section_totals,
+        'summary_stats': summary_stats
+    }
+
+@st.cache_data(show_spinner=False, max_entries=SELECTION_CACHE_ENTRIES)
+def compute_student_rankings(selection_key, _frame):
+    """Per-student key metrics and the top-10 leaderboard, cached on selection_key"""
+    # One per-student groupby feeds the key metrics, the top performer and the leaderboard
+    # Unsorted: the leaderboard ranks by score, so group order never reaches the page
+    per_student = grouped_or_flat(
+        _frame, 'roll_number', sort=False,
+        grand_total=('grand_total', 'max'),
+        tests_completed=('section', 'count')
+    ).reset_index()
+    leaderboard = per_student.nlargest(10, 'grand_total')  # Top 10 students
+    
+    return {
+        'total_students': len(per_student),
+        'avg_grand_total': per_student['grand_total'].mean(),
+        # Scalars rather than a one-row frame; None when no student has a grand total yet
+        'top_performer': (leaderboard['roll_number'].iloc[0], leaderboard['grand_total'].iloc[0]) if len(leaderboard) else None,
+        'leaderboard': leaderboard
+    }
+
 # ---------------------------------------------------------
 # SIDEBAR FILTERS
 # ---------------------------------------------------------
@@ -99,11 +688,18 @@ st.sidebar.header("🔍 Filters & Controls")
 
 # Add refresh button
 if st.sidebar.button("🔄 Clear Cache & Refresh Data"):
+    delete_snapshot()
+    load_all_evaluations.clear()
     st.cache_data.clear()
     st.rerun()
 
+# Load summary is opt-in, so ordinary filter reruns skip it
+if st.sidebar.checkbox("Show debug info", value=False, key="show_debug"):
+    evaluated_docs = int(df['is_fully_evaluated'].sum())
+    st.sidebar.info(f"📊 Loaded {len(df)} test records from {len(df['roll_number'].cat.categories)} students ({evaluated_docs} evaluated)")
+
 # Roll number filter
-all_rolls = sorted(df['roll_number'].unique())
+all_rolls = df['roll_number'].cat.categories.tolist()  # Categories are already sorted and all present
 selected_rolls = st.sidebar.multiselect(
     "Select Students:",
     options=all_rolls,
@@ -111,18 +707,29 @@ selected_rolls = st.sidebar.multiselect(
 )
 
 # Test type filter
-all_tests = sorted(df['section'].unique())
+all_tests = df['section'].cat.categories.tolist()
 selected_tests = st.sidebar.multiselect(
     "Select Tests:",
     options=all_tests,
     default=all_tests
 )
 
-# Filter data
-filtered_df = df[
-    (df['roll_number'].isin(selected_rolls)) & 
-    (df['section'].isin(selected_tests))
-]
+# Filter data on the categorical codes, so both checks are integer compares
+selected_rows = (
+    category_mask(df, 'roll_number', selected_rolls) &
+    category_mask(df, 'section', selected_tests)
+).nonzero()[0]
+filtered_df = df.iloc[selected_rows]
+
+# Nothing below has anything to show for an empty selection
+if filtered_df.empty:
+    st.info("No evaluation data for the current filter. Select at least one student and one test.")
+    st.stop()
+
+# Averages, per-test and per-student aggregates shared by every section below
+selection_key = (data_version, tuple(selected_rolls), tuple(selected_tests), len(filtered_df))
+insights = compute_insights(selection_key, filtered_df)
+rankings = compute_student_rankings(selection_key, filtered_df)
 
 # ---------------------------------------------------------
 # KEY METRICS DASHBOARD
@@ -130,10 +737,10 @@ filtered_df = df[
 st.header("📈 Key Performance Metrics")
 
 # Calculate overall metrics
-total_students = len(filtered_df['roll_number'].unique())
+total_students = rankings['total_students']
 total_tests = len(filtered_df)
-avg_grand_total = filtered_df.groupby('roll_number')['grand_total'].max().mean()
-top_performer = filtered_df.loc[filtered_df.groupby('roll_number')['grand_total'].idxmax()].nlargest(1, 'grand_total')
+avg_grand_total = rankings['avg_grand_total']
+top_performer = rankings['top_performer']
 
 col1, col2, col3, col4 = st.columns(4)
 with col1:
@@ -143,52 +750,32 @@ with col2:
 with col3:
     st.metric("Average Grand Total", f"{avg_grand_total:.1f}")
 with col4:
-    if not top_performer.empty:
-        st.metric("Top Performer", top_performer.iloc[0]['roll_number'], 
-                 delta=f"Score: {top_performer.iloc[0]['grand_total']}")
+    if top_performer is not None:
+        top_roll, top_score = top_performer
+        st.metric("Top Performer", top_roll, delta=f"Score: {top_score}")
 
-# ---------------------------------------------------------
-# INDIVIDUAL STUDENT ANALYSIS
-# ---------------------------------------------------------
 # ---------------------------------------------------------
 # COMPREHENSIVE INSIGHTS & RECOMMENDATIONS - SINGULAR VERSION
 # ---------------------------------------------------------
-st.header("💡 Individual Student Performance Insights")
+def render_insights(insights, selected_rolls):
+    """Individual/group insights, recommendations and skill chart for the current filter"""
+    st.header("💡 Individual Student Performance Insights")
 
-if not filtered_df.empty and selected_rolls:
-    # For individual student analysis, use data only for the selected student
+    # filtered_df already holds only the selected student(s), so the shared
+    # aggregation serves both the singular and the plural analysis
+    avg_mcq = insights['avg_mcq']
+    avg_likert = insights['avg_likert']
+    avg_manual = insights['avg_manual']
+    overall_avg = insights['overall_avg']
+    test_analysis = insights['test_analysis']
+    strong_flags = insights['strong_flags']
+    strong_areas = insights['strong_areas']
+    
     if len(selected_rolls) == 1:
         # SINGLE STUDENT ANALYSIS
-        student_df = filtered_df[filtered_df['roll_number'] == selected_rolls[0]]
-        
-        # Calculate metrics for this specific student
-        avg_mcq = student_df['auto_mcq'].mean()
-        avg_likert = student_df['auto_likert'].mean()
-        avg_manual = student_df['manual_total'].mean()
-        overall_avg = student_df['final_total'].mean()
-        
-        # Test-specific averages for this student
-        test_analysis = student_df.groupby('section').agg({
-            'final_total': 'mean',
-            'auto_mcq': 'mean',
-            'auto_likert': 'mean', 
-            'manual_total': 'mean'
-        }).round(1)
-        
         student_name = selected_rolls[0]
-        
     else:
         # MULTIPLE STUDENTS ANALYSIS (keep plural)
-        avg_mcq = filtered_df['auto_mcq'].mean()
-        avg_likert = filtered_df['auto_likert'].mean()
-        avg_manual = filtered_df['manual_total'].mean()
-        overall_avg = filtered_df['final_total'].mean()
-        test_analysis = filtered_df.groupby('section').agg({
-            'final_total': 'mean',
-            'auto_mcq': 'mean',
-            'auto_likert': 'mean', 
-            'manual_total': 'mean'
-        }).round(1)
         student_name = "Selected Students"
 
     # Create a visually appealing layout
@@ -201,76 +788,31 @@ if not filtered_df.empty and selected_rolls:
         # Performance narrative
         st.markdown("### 📊 Performance Overview")
         
-        # Create a performance score card
-        score_col1, score_col2, score_col3, score_col4 = st.columns(4)
-        with score_col1:
-            st.metric("Overall Score", f"{overall_avg:.1f}")
-        with score_col2:
-            st.metric("Analytical", f"{avg_mcq:.1f}")
-        with score_col3:
-            st.metric("Adaptability", f"{avg_likert:.1f}")
-        with score_col4:
-            st.metric("Communication", f"{avg_manual:.1f}")
+        # Create a performance score card - delta-free numbers, so one HTML row instead of four st.metric widgets
+        score_metrics = (
+            ("Overall Score", overall_avg),
+            ("Analytical", avg_mcq),
+            ("Adaptability", avg_likert),
+            ("Communication", avg_manual)
+        )
+        score_tiles = "".join(
+            f"<div class='metric-tile'><div class='label'>{label}</div><div class='value'>{value:.1f}</div></div>"
+            for label, value in score_metrics
+        )
+        st.markdown(f"<div class='metric-row'>{score_tiles}</div>", unsafe_allow_html=True)
         
         # DYNAMIC PERFORMANCE NARRATIVE - SINGULAR VERSION
-        if len(selected_rolls) == 1:
-            # SINGULAR LANGUAGE FOR INDIVIDUAL STUDENT
-            if avg_likert >= 20 and avg_mcq >= 15 and avg_manual >= 10:
-                narrative = f"""
-                <b>{student_name}</b> is demonstrating <b>excellent balanced performance</b> across all assessment domains with an overall average of {overall_avg:.1f}. 
-                The strong adaptability score ({avg_likert:.1f}) indicates great learning agility, while solid analytical ({avg_mcq:.1f}) 
-                and communication skills ({avg_manual:.1f}) show well-rounded development.
-                """
-                tone_color = "#4CAF50"
-                title = "🎉 Exceptional All-Round Performance"
-            elif avg_likert >= 20:
-                narrative = f"""
-                <b>{student_name}</b> shows <b>strong adaptability and learning agility</b> ({avg_likert:.1f}) with an overall score of {overall_avg:.1f}. 
-                While adaptability is a key strength, there are opportunities to enhance analytical thinking ({avg_mcq:.1f}) 
-                and communication skills ({avg_manual:.1f}) to achieve more balanced performance.
-                """
-                tone_color = "#2196F3"
-                title = "🚀 Adaptability Strength with Growth Opportunities"
-            else:
-                narrative = f"""
-                With an overall score of {overall_avg:.1f}, <b>{student_name}</b> is building foundational skills across adaptability ({avg_likert:.1f}), 
-                analytical thinking ({avg_mcq:.1f}), and communication ({avg_manual:.1f}). Targeted focus on conceptual understanding 
-                and skill application can drive significant improvement.
-                """
-                tone_color = "#FF9800"
-                title = "📚 Foundational Development Focus Needed"
-        else:
-            # PLURAL LANGUAGE FOR MULTIPLE STUDENTS
-            if avg_likert >= 20 and avg_mcq >= 15 and avg_manual >= 10:
-                narrative = f"""
-                Students are demonstrating <b>excellent balanced performance</b> across all assessment domains with an overall average of {overall_avg:.1f}. 
-                The strong adaptability scores ({avg_likert:.1f}) indicate great learning agility, while solid analytical ({avg_mcq:.1f}) 
-                and communication skills ({avg_manual:.1f}) show well-rounded development.
-                """
-                tone_color = "#4CAF50"
-                title = "🎉 Exceptional All-Round Performance"
-            elif avg_likert >= 20:
-                narrative = f"""
-                Students show <b>strong adaptability and learning agility</b> ({avg_likert:.1f}) with an overall score of {overall_avg:.1f}. 
-                While adaptability is a key strength, there are opportunities to enhance analytical thinking ({avg_mcq:.1f}) 
-                and communication skills ({avg_manual:.1f}) to achieve more balanced performance.
-                """
-                tone_color = "#2196F3"
-                title = "🚀 Adaptability Strength with Growth Opportunities"
-            else:
-                narrative = f"""
-                With an overall score of {overall_avg:.1f}, students are building foundational skills across adaptability ({avg_likert:.1f}), 
-                analytical thinking ({avg_mcq:.1f}), and communication ({avg_manual:.1f}). Targeted focus on conceptual understanding 
-                and skill application can drive significant improvement.
-                """
-                tone_color = "#FF9800"
-                title = "📚 Foundational Development Focus Needed"
+        tone, narrative = performance_narrative(
+            student_name if len(selected_rolls) == 1 else None,
+            strong_flags, avg_mcq, avg_likert, avg_manual, overall_avg
+        )
+        tone_color, title = NARRATIVE_TONES[tone]
         
         st.markdown("---")
         st.markdown(f"""
-        <div style='background-color: #f8f9fa; padding: 20px; border-radius: 10px; border-left: 5px solid {tone_color};'>
-        <h4 style='color: {tone_color}; margin-top: 0;'>{title}</h4>
-        <p style='font-size: 16px; line-height: 1.6; color: #333;'>
+        <div class='narrative-card' style='--tone: {tone_color};'>
+        <h4>{title}</h4>
+        <p>
         {narrative}
         </p>
         </div>
@@ -279,79 +821,25 @@ if not filtered_df.empty and selected_rolls:
         # TEST-WISE PERFORMANCE BREAKDOWN
         st.markdown("### 🎯 Test Performance Analysis")
         
-        # Create performance cards for each test
-        for test_name in test_analysis.index:
-            test_data = test_analysis.loc[test_name]
-            avg_score = test_data['final_total']
-            
-            # Determine performance level and styling
-            if avg_score >= 80:
-                performance_level = "Excellent"
-                color = "#4CAF50"
-                icon = "🎯"
-                bg_color = "#f0fff0"
-            elif avg_score >= 60:
-                performance_level = "Good"
-                color = "#2196F3"
-                icon = "✅"
-                bg_color = "#f0f8ff"
-            elif avg_score >= 40:
-                performance_level = "Average"
-                color = "#FF9800"
-                icon = "⚠️"
-                bg_color = "#fff8f0"
-            else:
-                performance_level = "Needs Improvement"
-                color = "#F44336"
-                icon = "🚨"
-                bg_color = "#fff0f0"
-            
-            # Create test performance card
-            st.markdown(f"""
-            <div style='background-color: {bg_color}; padding: 15px; border-radius: 10px; border-left: 5px solid {color}; margin: 10px 0;'>
-            <div style='display: flex; justify-content: space-between; align-items: center;'>
-                <div>
-                    <h4 style='color: {color}; margin: 0;'>{icon} {test_name}</h4>
-                    <p style='margin: 5px 0; font-size: 18px; font-weight: bold;'>Score: <span style='color: {color};'>{avg_score}</span> ({performance_level})</p>
-                </div>
-                <div style='text-align: right;'>
-                    <div style='font-size: 24px; color: {color};'>{icon}</div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Add test-specific insights - SINGULAR VERSION
-            insight_text = ""
-            if "Aptitude" in test_name:
-                mcq_avg = test_data['auto_mcq']
-                if len(selected_rolls) == 1:
-                    insight_text = "• Demonstrates strong analytical thinking and problem-solving skills" if mcq_avg >= 15 else "• Could benefit from strengthening logical reasoning and quantitative analysis"
-                else:
-                    insight_text = "• Strong analytical thinking and problem-solving skills demonstrated" if mcq_avg >= 15 else "• Opportunity to strengthen logical reasoning and quantitative analysis"
-                
-            elif "Adaptability" in test_name:
-                likert_avg = test_data['auto_likert']
-                if len(selected_rolls) == 1:
-                    insight_text = "• Shows excellent learning agility and flexibility in new situations" if likert_avg >= 20 else "• Should develop resilience and adaptability to changing circumstances"
-                else:
-                    insight_text = "• Excellent learning agility and flexibility in new situations" if likert_avg >= 20 else "• Develop resilience and adaptability to changing circumstances"
-                
-            elif "Communication Skills - Objective" in test_name:
-                mcq_avg = test_data['auto_mcq']
-                if len(selected_rolls) == 1:
-                    insight_text = "• Has a solid foundation in language fundamentals and comprehension" if mcq_avg >= 10 else "• Should build vocabulary and grammar fundamentals for better expression"
-                else:
-                    insight_text = "• Solid foundation in language fundamentals and comprehension" if mcq_avg >= 10 else "• Build vocabulary and grammar fundamentals for better expression"
-                
-            elif "Communication Skills - Descriptive" in test_name:
-                manual_avg = test_data['manual_total']
-                if len(selected_rolls) == 1:
-                    insight_text = "• Demonstrates effective written expression and structured communication" if manual_avg >= 15 else "• Should practice organizing thoughts and expressing ideas clearly in writing"
-                else:
-                    insight_text = "• Effective written expression and structured communication" if manual_avg >= 15 else "• Practice organizing thoughts and expressing ideas clearly in writing"
-            
-            st.markdown(f"<p style='margin: 10px 0; color: #666;'>{insight_text}</p>", unsafe_allow_html=True)
-            st.markdown("</div>", unsafe_allow_html=True)
+        # Test-specific insight lines, picked for all tests at once (first matching rule wins)
+        detail_idx = 0 if len(selected_rolls) == 1 else 1
+        test_names = test_analysis.index.astype(str)
+        insight_texts = np.select(
+            [test_names.str.contains(fragment, regex=False) for fragment, *_ in TEST_INSIGHT_RULES],
+            [np.where(test_analysis[column] >= threshold, strong[detail_idx], weak[detail_idx])
+             for _, column, threshold, strong, weak in TEST_INSIGHT_RULES],
+            default=""
+        )
+        
+        # Tier, label and icon are precomputed columns, so every card is one template fill;
+        # all of them go out in a single markdown call
+        st.markdown("".join(
+            TEST_CARD_TEMPLATE.format(
+                tier=row.tier, icon=row.icon, name=row.Index,
+                score=row.final_total, level=row.level, insight=insight_text
+            )
+            for row, insight_text in zip(test_analysis.itertuples(), insight_texts)
+        ), unsafe_allow_html=True)
     
     with col2:
         # RECOMMENDATIONS & ACTION PLAN
@@ -360,161 +848,57 @@ if not filtered_df.empty and selected_rolls:
         else:
             st.subheader("🚀 Group Action Plan")
         
-        # Generate recommendations first
-        recommendations = []
-        
-        # Dynamic recommendations based on actual performance
-        if avg_mcq < 15:
-            if len(selected_rolls) == 1:
-                recommendations.append({
-                    "title": "Strengthen Analytical Thinking",
-                    "icon": "🧠",
-                    "priority": "High",
-                    "details": "Practice logical reasoning and problem-solving exercises"
-                })
-            else:
-                recommendations.append({
-                    "title": "Strengthen Analytical Thinking",
-                    "icon": "🧠",
-                    "priority": "High",
-                    "details": "Students should practice logical reasoning exercises"
-                })
-        
-        if avg_likert < 20:
-            if len(selected_rolls) == 1:
-                recommendations.append({
-                    "title": "Develop Adaptability", 
-                    "icon": "🔄",
-                    "priority": "Medium" if avg_likert >= 15 else "High",
-                    "details": "Scenario-based learning and flexibility training"
-                })
-            else:
-                recommendations.append({
-                    "title": "Develop Adaptability", 
-                    "icon": "🔄",
-                    "priority": "Medium" if avg_likert >= 15 else "High",
-                    "details": "Students need scenario-based learning practice"
-                })
-        
-        if avg_manual < 10:
-            if len(selected_rolls) == 1:
-                recommendations.append({
-                    "title": "Enhance Communication",
-                    "icon": "✍️",
-                    "priority": "High", 
-                    "details": "Structured writing practice and expression exercises"
-                })
-            else:
-                recommendations.append({
-                    "title": "Enhance Communication",
-                    "icon": "✍️",
-                    "priority": "High", 
-                    "details": "Students need structured writing practice"
-                })
-        
-        # Add positive reinforcement for strengths
-        if avg_likert >= 20:
-            if len(selected_rolls) == 1:
-                recommendations.append({
-                    "title": "Leverage Adaptability Strength",
-                    "icon": "⭐",
-                    "priority": "Low",
-                    "details": "Apply learning agility to other skill areas"
-                })
-            else:
-                recommendations.append({
-                    "title": "Leverage Adaptability Strength",
-                    "icon": "⭐",
-                    "priority": "Low",
-                    "details": "Students can apply learning agility to other areas"
-                })
-        
-        if avg_mcq >= 15:
-            if len(selected_rolls) == 1:
-                recommendations.append({
-                    "title": "Build on Analytical Skills", 
-                    "icon": "📊",
-                    "priority": "Low",
-                    "details": "Tackle more complex problem-solving challenges"
-                })
-            else:
-                recommendations.append({
-                    "title": "Build on Analytical Skills", 
-                    "icon": "📊",
-                    "priority": "Low",
-                    "details": "Students can tackle complex problem-solving"
-                })
+        # Generate recommendations in one pass over the static rule table
+        recommendations = [
+            {"title": title, "icon": icon, "priority": priority, "details": details[detail_idx]}
+            for applies, title, icon, priority, details in RECOMMENDATION_RULES
+            if applies(avg_mcq, avg_likert, avg_manual)
+        ] or [DEFAULT_RECOMMENDATION[detail_idx]]
         
-        # If no specific recommendations, add general one
-        if not recommendations:
-            if len(selected_rolls) == 1:
-                recommendations.append({
-                    "title": "Maintain Current Progress",
-                    "icon": "✅",
-                    "priority": "Low", 
-                    "details": "Continue with current learning strategies"
-                })
-            else:
-                recommendations.append({
-                    "title": "Maintain Current Progress",
-                    "icon": "✅",
-                    "priority": "Low", 
-                    "details": "Students should continue current strategies"
-                })
-        
-        # Priority Recommendations
-        st.markdown("""
-        <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 20px; border-radius: 10px;'>
-        <h4 style='color: white; margin-top: 0;'>🎯 Priority Actions</h4>
-        """, unsafe_allow_html=True)
-        
-        # Display recommendations
-        for i, rec in enumerate(recommendations[:4]):
-            priority_color = {"High": "#FF6B6B", "Medium": "#FFA726", "Low": "#66BB6A"}
-            
-            st.markdown(f"""
-            <div style='background-color: rgba(255,255,255,0.2); padding: 15px; border-radius: 8px; margin: 10px 0;'>
-                <div style='display: flex; justify-content: space-between; align-items: start;'>
-                    <div style='font-size: 24px; margin-right: 10px;'>{rec['icon']}</div>
-                    <div style='flex-grow: 1;'>
-                        <h5 style='color: white; margin: 0 0 5px 0;'>{rec['title']}</h5>
-                        <p style='color: rgba(255,255,255,0.9); margin: 0; font-size: 14px;'>{rec['details']}</p>
+        # Priority Recommendations - wrapper and cards go out in a single markdown call
+        rec_cards = []
+        for rec in recommendations[:4]:
+            rec_cards.append(f"""
+            <div class='rec-card'>
+                <div class='row'>
+                    <div class='icon'>{rec['icon']}</div>
+                    <div class='body'>
+                        <h5>{rec['title']}</h5>
+                        <p>{rec['details']}</p>
                     </div>
-                    <div style='background-color: {priority_color[rec['priority']]}; color: white; padding: 2px 8px; border-radius: 12px; font-size: 12px;'>
+                    <div class='priority priority-{rec['priority'].lower()}'>
                         {rec['priority']}
                     </div>
                 </div>
             </div>
-            """, unsafe_allow_html=True)
+            """)
         
-        st.markdown("</div>", unsafe_allow_html=True)
+        st.markdown(f"""
+            <div class='action-plan'>
+            <h4>🎯 Priority Actions</h4>
+            {"".join(rec_cards)}
+            </div>
+            """, unsafe_allow_html=True)
         
         # SKILL DISTRIBUTION VISUALIZATION
         st.markdown("### 🔧 Skill Mastery Levels")
         
-        skill_data = {
-            'Category': ['Analytical', 'Adaptability', 'Communication'],
-            'Score': [avg_mcq, avg_likert, avg_manual],
-            'Max_Possible': [30, 40, 30],
-            'Color': ['#FF6B6B', '#4ECDC4', '#45B7D1']
-        }
-        skill_df = pd.DataFrame(skill_data)
-        skill_df['Percentage'] = (skill_df['Score'] / skill_df['Max_Possible'] * 100).round(1)
-        
-        # Create a horizontal bar chart for skill distribution
-        fig_skills = go.Figure()
+        # Three bars - plain tuples, no DataFrame needed
+        skill_names, skill_maxes, skill_colors = zip(*SKILL_META)
+        skill_scores = (avg_mcq, avg_likert, avg_manual)
+        skill_pcts = [round(score / max_score * 100, 1) for score, max_score in zip(skill_scores, skill_maxes)]
         
-        for i, row in skill_df.iterrows():
-            fig_skills.add_trace(go.Bar(
-                y=[row['Category']],
-                x=[row['Percentage']],
-                orientation='h',
-                name=row['Category'],
-                marker_color=row['Color'],
-                text=[f"{row['Percentage']}%"],
-                textposition='auto',
-                hovertemplate=f"<b>{row['Category']}</b><br>Score: {row['Score']}<br>Percentage: {row['Percentage']}%<extra></extra>"
-            ))
+        # Create a horizontal bar chart for skill distribution (one trace, one bar per skill)
+        fig_skills = go.Figure(go.Bar(
+            y=skill_names,
+            x=skill_pcts,
+            orientation='h',
+            marker_color=skill_colors,
+            customdata=skill_scores,
+            text=[f"{p}%" for p in skill_pcts],
+            textposition='auto',
+            hovertemplate="<b>%{y}</b><br>Score: %{customdata}<br>Percentage: %{x}%<extra></extra>"
+        ))
         
         fig_skills.update_layout(
             title="Skill Mastery Percentage",
@@ -526,106 +910,127 @@ if not filtered_df.empty and selected_rolls:
         )
         
         st.plotly_chart(fig_skills, use_container_width=True)
+        
+        # QUICK STATS
+        st.markdown("### 📈 Performance Snapshot")
+        
+        # Stacked in the narrow right column rather than split into a nested column pair
+        improvement_needed = 3 - strong_areas
+        st.metric("Strong Areas", strong_areas)
+        st.metric("Focus Areas", improvement_needed)
+
+render_insights(insights, selected_rolls)
 
 # ---------------------------------------------------------
 # SCORE COMPOSITION ANALYSIS
 # ---------------------------------------------------------
 st.header("🎯 Score Composition Analysis")
 
-col1, col2 = st.columns(2)
-
-with col1:
-    # Overall score type distribution
-    total_mcq = filtered_df['auto_mcq'].sum()
-    total_likert = filtered_df['auto_likert'].sum()
-    total_manual = filtered_df['manual_total'].sum()
-    
-    composition_data = pd.DataFrame({
-        'Type': ['MCQ', 'Likert', 'Manual'],
-        'Total Marks': [total_mcq, total_likert, total_manual]
-    })
+@st.cache_data(show_spinner=False, max_entries=SELECTION_CACHE_ENTRIES)
+def composition_figure(selection_key, _section_totals):
+    """Assessment-type totals beside the per-test breakdown, as one plain figure dict cached on selection_key"""
+    # Per-test sums are never NaN, so one plain numpy reduction over the block is enough
+    total_mcq, total_likert, total_manual = _section_totals.to_numpy().sum(axis=0)
     
-    fig_composition = px.bar(
-        composition_data,
-        x='Type',
-        y='Total Marks',
-        title="📊 Total Marks by Assessment Type",
-        color='Type',
-        color_discrete_sequence=px.colors.qualitative.Set3
-    )
-    st.plotly_chart(fig_composition, use_container_width=True)
-
-with col2:
-    # Test-wise score type breakdown
-    test_breakdown = filtered_df.groupby('section')[['auto_mcq', 'auto_likert', 'manual_total']].sum().reset_index()
-    test_breakdown_melted = test_breakdown.melt(
-        id_vars=['section'], 
-        value_vars=['auto_mcq', 'auto_likert', 'manual_total'],
-        var_name='Score Type', 
-        value_name='Marks'
+    # Both charts share one figure, so the browser boots and lays out a single plot
+    fig = make_subplots(
+        rows=1, cols=2,
+        subplot_titles=("📊 Total Marks by Assessment Type", "🎨 Score Type Breakdown by Test")
     )
+    # One bar trace with per-bar colours instead of one trace per assessment type
+    fig.add_trace(go.Bar(
+        x=['MCQ', 'Likert', 'Manual'],
+        y=[total_mcq, total_likert, total_manual],
+        marker_color=px.colors.qualitative.Set3[:3],
+        showlegend=False
+    ), row=1, col=1)
+    # Test-wise score type breakdown - one stacked trace per score column, no melted frame
+    for column, label in (('auto_mcq', 'MCQ'), ('auto_likert', 'Likert'), ('manual_total', 'Manual')):
+        fig.add_trace(go.Bar(x=_section_totals.index.astype(str), y=_section_totals[column], name=label), row=1, col=2)
     
-    # Clean up score type names
-    test_breakdown_melted['Score Type'] = test_breakdown_melted['Score Type'].replace({
-        'auto_mcq': 'MCQ',
-        'auto_likert': 'Likert',
-        'manual_total': 'Manual'
-    })
-    
-    fig_breakdown = px.bar(
-        test_breakdown_melted,
-        x='section',
-        y='Marks',
-        color='Score Type',
-        title="🎨 Score Type Breakdown by Test",
-        barmode='stack'
-    )
-    st.plotly_chart(fig_breakdown, use_container_width=True)
+    fig.update_xaxes(title_text="Type", row=1, col=1)
+    fig.update_yaxes(title_text="Total Marks", row=1, col=1)
+    fig.update_xaxes(title_text="section", row=1, col=2)
+    fig.update_yaxes(title_text="Marks", row=1, col=2)
+    fig.update_layout(legend_title_text="Score Type", barmode='stack')
+    return fig.to_dict()
+
+def render_score_composition(selection_key, section_totals):
+    """Assessment-type totals and the per-test stacked breakdown"""
+    st.plotly_chart(composition_figure(selection_key, section_totals), use_container_width=True)
+
+# Below the fold - the charts are only built once the reader asks for them
+with st.expander("Show score composition charts", expanded=False):
+    if st.checkbox("Build composition charts", key="show_composition"):
+        render_score_composition(selection_key, insights['section_totals'])
 
 # ---------------------------------------------------------
 # TREND ANALYSIS
 # ---------------------------------------------------------
 st.header("📈 Performance Trends")
 
-if len(selected_rolls) > 1:
-    # Line chart comparing multiple students
-    trend_data = filtered_df.pivot_table(
-        index='section', 
-        columns='roll_number', 
-        values='final_total', 
-        aggfunc='max'
-    ).reset_index()
+@st.cache_data(show_spinner=False, max_entries=SELECTION_CACHE_ENTRIES)
+def trend_figure(selection_key, trend_students, _frame):
+    """Per-test score lines for the given students as a plain figure dict, cached on selection_key"""
+    # Line chart comparing multiple students - only the plotted ones are aggregated
+    trend_df = _frame[category_mask(_frame, 'roll_number', trend_students)]
+    # Plain groupby + unstack; the all-NaN drops keep pivot_table's output shape
+    trend_data = (
+        trend_df.groupby(['section', 'roll_number'], observed=True)['final_total']
+        .max()
+        .unstack('roll_number')
+        .dropna(how='all')
+        .dropna(axis=1, how='all')
+        .reset_index()
+    )
     
-    fig_trend = go.Figure()
-    for student in selected_rolls[:5]:  # Limit to 5 students for clarity
-        if student in trend_data.columns:
-            fig_trend.add_trace(go.Scatter(
+    # WebGL lines: the browser rasterises on the GPU instead of building SVG nodes per point
+    # All traces and the layout go into one constructor call instead of per-student add_trace
+    fig_trend = go.Figure(
+        data=[
+            go.Scattergl(
                 x=trend_data['section'],
                 y=trend_data[student],
                 mode='lines+markers',
                 name=student
-            ))
-    
-    fig_trend.update_layout(
-        title="📈 Performance Trends Across Tests",
-        xaxis_title="Tests",
-        yaxis_title="Scores",
-        hovermode='x unified'
+            )
+            for student in trend_students
+            if student in trend_data.columns
+        ],
+        layout=dict(
+            title="📈 Performance Trends Across Tests",
+            xaxis=dict(title="Tests"),
+            yaxis=dict(title="Scores"),
+            hovermode='x unified'
+        )
     )
-    st.plotly_chart(fig_trend, use_container_width=True)
+    return fig_trend.to_dict()
+
+if len(selected_rolls) > 1:
+    with st.expander("Show performance trends", expanded=False):
+        if st.checkbox("Build trend chart", key="show_trends"):
+            # Capped for clarity; more lines are an explicit opt-in. The stored count is clamped
+            # to the current selection first, since a smaller selection lowers max_value
+            st.session_state["trend_count"] = min(
+                st.session_state.get("trend_count", TREND_DEFAULT_STUDENTS), len(selected_rolls)
+            )
+            trend_count = st.number_input(
+                "Students to plot",
+                min_value=2,
+                max_value=len(selected_rolls),
+                key="trend_count"
+            )
+            if trend_count > TREND_WARN_STUDENTS:
+                st.warning(f"Plotting more than {TREND_WARN_STUDENTS} students makes the chart hard to read.")
+            st.plotly_chart(trend_figure(selection_key, selected_rolls[:trend_count], filtered_df), use_container_width=True)
 
 # ---------------------------------------------------------
 # RANKING AND LEADERBOARD (SIMPLIFIED)
 # ---------------------------------------------------------
 st.header("🏆 Student Rankings")
 
-# Calculate rankings
-leaderboard = filtered_df.groupby('roll_number').agg({
-    'grand_total': 'max',
-    'section': 'count'
-}).rename(columns={'section': 'tests_completed'}).reset_index()
-
-leaderboard = leaderboard.nlargest(10, 'grand_total')  # Top 10 students
+# Rankings come from the cached per-student aggregation
+leaderboard = rankings['leaderboard']
 
 # Display as a clean table instead of chart
 st.subheader("Top 10 Performers")
@@ -634,342 +1039,57 @@ leaderboard_display = leaderboard[['roll_number', 'grand_total', 'tests_complete
 )
 st.dataframe(leaderboard_display, use_container_width=True)
 
-# ---------------------------------------------------------
-# COMPREHENSIVE INSIGHTS & RECOMMENDATIONS
-# ---------------------------------------------------------
-st.header("💡 Comprehensive Performance Insights & Recommendations")
-
-if not filtered_df.empty:
-    # Calculate overall metrics
-    avg_mcq = filtered_df['auto_mcq'].mean()
-    avg_likert = filtered_df['auto_likert'].mean()
-    avg_manual = filtered_df['manual_total'].mean()
-    overall_avg = filtered_df['final_total'].mean()
-    
-    # Test-specific averages
-    test_analysis = filtered_df.groupby('section').agg({
-        'final_total': 'mean',
-        'auto_mcq': 'mean',
-        'auto_likert': 'mean', 
-        'manual_total': 'mean'
-    }).round(1)
-    
-    # Create a visually appealing layout
-    col1, col2 = st.columns([2, 1])
-    
-    with col1:
-        # MAIN INSIGHTS CARD
-        st.subheader("🎯 Executive Summary")
-        
-        # Performance narrative
-        st.markdown("### 📊 Overall Performance Overview")
-        
-        # Create a performance score card
-        score_col1, score_col2, score_col3, score_col4 = st.columns(4)
-        with score_col1:
-            st.metric("Overall Score", f"{overall_avg:.1f}")
-        with score_col2:
-            st.metric("Analytical", f"{avg_mcq:.1f}")
-        with score_col3:
-            st.metric("Adaptability", f"{avg_likert:.1f}")
-        with score_col4:
-            st.metric("Communication", f"{avg_manual:.1f}")
-        
-        # Dynamic performance narrative based on scores
-        if avg_likert >= 20 and avg_mcq >= 15 and avg_manual >= 10:
-            narrative = f"""
-            Students are demonstrating <b>excellent balanced performance</b> across all assessment domains with an overall average of {overall_avg:.1f}. 
-            The strong adaptability scores ({avg_likert:.1f}) indicate great learning agility, while solid analytical ({avg_mcq:.1f}) 
-            and communication skills ({avg_manual:.1f}) show well-rounded development.
-            """
-            tone_color = "#4CAF50"
-            title = "🎉 Exceptional All-Round Performance"
-        elif avg_likert >= 20:
-            narrative = f"""
-            Students show <b>strong adaptability and learning agility</b> ({avg_likert:.1f}) with an overall score of {overall_avg:.1f}. 
-            While adaptability is a key strength, there are opportunities to enhance analytical thinking ({avg_mcq:.1f}) 
-            and communication skills ({avg_manual:.1f}) to achieve more balanced performance.
-            """
-            tone_color = "#2196F3"
-            title = "🚀 Adaptability Strength with Growth Opportunities"
-        else:
-            narrative = f"""
-            With an overall score of {overall_avg:.1f}, students are building foundational skills across adaptability ({avg_likert:.1f}), 
-            analytical thinking ({avg_mcq:.1f}), and communication ({avg_manual:.1f}). Targeted focus on conceptual understanding 
-            and skill application can drive significant improvement.
-            """
-            tone_color = "#FF9800"
-            title = "📚 Foundational Development Focus Needed"
-        
-        st.markdown("---")
-        st.markdown(f"""
-        <div style='background-color: #f8f9fa; padding: 20px; border-radius: 10px; border-left: 5px solid {tone_color};'>
-        <h4 style='color: {tone_color}; margin-top: 0;'>{title}</h4>
-        <p style='font-size: 16px; line-height: 1.6; color: #333;'>
-        {narrative}
-        </p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # TEST-WISE PERFORMANCE BREAKDOWN
-        st.markdown("### 🎯 Detailed Test Analysis")
-        
-        # Create performance cards for each test
-        for test_name in test_analysis.index:
-            test_data = test_analysis.loc[test_name]
-            avg_score = test_data['final_total']
-            
-            # Determine performance level and styling
-            if avg_score >= 80:
-                performance_level = "Excellent"
-                color = "#4CAF50"
-                icon = "🎯"
-                bg_color = "#f0fff0"
-            elif avg_score >= 60:
-                performance_level = "Good"
-                color = "#2196F3"
-                icon = "✅"
-                bg_color = "#f0f8ff"
-            elif avg_score >= 40:
-                performance_level = "Average"
-                color = "#FF9800"
-                icon = "⚠️"
-                bg_color = "#fff8f0"
-            else:
-                performance_level = "Needs Improvement"
-                color = "#F44336"
-                icon = "🚨"
-                bg_color = "#fff0f0"
-            
-            # Create test performance card
-            st.markdown(f"""
-            <div style='background-color: {bg_color}; padding: 15px; border-radius: 10px; border-left: 5px solid {color}; margin: 10px 0;'>
-            <div style='display: flex; justify-content: space-between; align-items: center;'>
-                <div>
-                    <h4 style='color: {color}; margin: 0;'>{icon} {test_name}</h4>
-                    <p style='margin: 5px 0; font-size: 18px; font-weight: bold;'>Average Score: <span style='color: {color};'>{avg_score}</span> ({performance_level})</p>
-                </div>
-                <div style='text-align: right;'>
-                    <div style='font-size: 24px; color: {color};'>{icon}</div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Add test-specific insights
-            insight_text = ""
-            if "Aptitude" in test_name:
-                mcq_avg = test_data['auto_mcq']
-                insight_text = "• Strong analytical thinking and problem-solving skills demonstrated" if mcq_avg >= 15 else "• Opportunity to strengthen logical reasoning and quantitative analysis"
-                
-            elif "Adaptability" in test_name:
-                likert_avg = test_data['auto_likert']
-                insight_text = "• Excellent learning agility and flexibility in new situations" if likert_avg >= 20 else "• Develop resilience and adaptability to changing circumstances"
-                
-            elif "Communication Skills - Objective" in test_name:
-                mcq_avg = test_data['auto_mcq']
-                insight_text = "• Solid foundation in language fundamentals and comprehension" if mcq_avg >= 10 else "• Build vocabulary and grammar fundamentals for better expression"
-                
-            elif "Communication Skills - Descriptive" in test_name:
-                manual_avg = test_data['manual_total']
-                insight_text = "• Effective written expression and structured communication" if manual_avg >= 15 else "• Practice organizing thoughts and expressing ideas clearly in writing"
-            
-            st.markdown(f"<p style='margin: 10px 0; color: #666;'>{insight_text}</p>", unsafe_allow_html=True)
-            st.markdown("</div>", unsafe_allow_html=True)
-    
-    with col2:
-        # RECOMMENDATIONS & ACTION PLAN
-        st.subheader("🚀 Personalized Action Plan")
-        
-        # Priority Recommendations
-        st.markdown("""
-        <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 20px; border-radius: 10px;'>
-        <h4 style='color: white; margin-top: 0;'>🎯 Priority Actions</h4>
-        """, unsafe_allow_html=True)
-        
-        recommendations = []
-        
-        # Dynamic recommendations based on actual performance
-        if avg_mcq < 15:
-            recommendations.append({
-                "title": "Strengthen Analytical Thinking",
-                "icon": "🧠",
-                "priority": "High",
-                "details": "Practice logical reasoning and problem-solving exercises"
-            })
-        
-        if avg_likert < 20:
-            recommendations.append({
-                "title": "Develop Adaptability", 
-                "icon": "🔄",
-                "priority": "Medium" if avg_likert >= 15 else "High",
-                "details": "Scenario-based learning and flexibility training"
-            })
-        
-        if avg_manual < 10:
-            recommendations.append({
-                "title": "Enhance Communication",
-                "icon": "✍️",
-                "priority": "High", 
-                "details": "Structured writing practice and expression exercises"
-            })
-        
-        # Add positive reinforcement for strengths
-        if avg_likert >= 20:
-            recommendations.append({
-                "title": "Leverage Adaptability Strength",
-                "icon": "⭐",
-                "priority": "Low",
-                "details": "Apply learning agility to other skill areas"
-            })
-        
-        if avg_mcq >= 15:
-            recommendations.append({
-                "title": "Build on Analytical Skills", 
-                "icon": "📊",
-                "priority": "Low",
-                "details": "Tackle more complex problem-solving challenges"
-            })
-        
-        # If no specific recommendations, add general one
-        if not recommendations:
-            recommendations.append({
-                "title": "Maintain Current Progress",
-                "icon": "✅",
-                "priority": "Low", 
-                "details": "Continue with current learning strategies"
-            })
-        
-        # Display recommendations
-        for i, rec in enumerate(recommendations[:4]):  # Show top 4
-            priority_color = {"High": "#FF6B6B", "Medium": "#FFA726", "Low": "#66BB6A"}
-            
-            st.markdown(f"""
-            <div style='background-color: rgba(255,255,255,0.2); padding: 15px; border-radius: 8px; margin: 10px 0;'>
-                <div style='display: flex; justify-content: space-between; align-items: start;'>
-                    <div style='font-size: 24px; margin-right: 10px;'>{rec['icon']}</div>
-                    <div style='flex-grow: 1;'>
-                        <h5 style='color: white; margin: 0 0 5px 0;'>{rec['title']}</h5>
-                        <p style='color: rgba(255,255,255,0.9); margin: 0; font-size: 14px;'>{rec['details']}</p>
-                    </div>
-                    <div style='background-color: {priority_color[rec['priority']]}; color: white; padding: 2px 8px; border-radius: 12px; font-size: 12px;'>
-                        {rec['priority']}
-                    </div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        st.markdown("</div>", unsafe_allow_html=True)
-        
-        # SKILL DISTRIBUTION VISUALIZATION
-        st.markdown("### 🔧 Skill Mastery Levels")
-        
-        skill_data = {
-            'Category': ['Analytical', 'Adaptability', 'Communication'],
-            'Score': [avg_mcq, avg_likert, avg_manual],
-            'Max_Possible': [30, 40, 30],
-            'Color': ['#FF6B6B', '#4ECDC4', '#45B7D1']
-        }
-        skill_df = pd.DataFrame(skill_data)
-        skill_df['Percentage'] = (skill_df['Score'] / skill_df['Max_Possible'] * 100).round(1)
-        
-        # Create a horizontal bar chart for skill distribution
-        fig_skills = go.Figure()
-        
-        for i, row in skill_df.iterrows():
-            fig_skills.add_trace(go.Bar(
-                y=[row['Category']],
-                x=[row['Percentage']],
-                orientation='h',
-                name=row['Category'],
-                marker_color=row['Color'],
-                text=[f"{row['Percentage']}%"],
-                textposition='auto',
-                hovertemplate=f"<b>{row['Category']}</b><br>Score: {row['Score']}<br>Percentage: {row['Percentage']}%<extra></extra>"
-            ))
-        
-        fig_skills.update_layout(
-            title="Skill Mastery Percentage",
-            xaxis=dict(range=[0, 100], title="Mastery %"),
-            yaxis_title="Skill Area",
-            showlegend=False,
-            height=250,
-            margin=dict(l=50, r=50, t=50, b=50)
-        )
-        
-        st.plotly_chart(fig_skills, use_container_width=True)
-        
-        # QUICK STATS
-        st.markdown("### 📈 Performance Snapshot")
-        
-        # Calculate performance indicators
-        strong_areas = sum([avg_mcq >= 15, avg_likert >= 20, avg_manual >= 10])
-        
-        stats_col1, stats_col2 = st.columns(2)
-        with stats_col1:
-            st.metric("Strong Areas", strong_areas)
-        
-        with stats_col2:
-            improvement_needed = 3 - strong_areas
-            st.metric("Focus Areas", improvement_needed)
-
 # Performance Growth Pathway
 st.markdown("---")
 st.subheader("📈 Growth Pathway")
 
+# Inputs come from the shared aggregation, since render_insights keeps its own scope
+avg_mcq = insights['avg_mcq']
+avg_likert = insights['avg_likert']
+avg_manual = insights['avg_manual']
+strong_areas = insights['strong_areas']
+
 # Create dynamic growth recommendations based on performance
-growth_col1, growth_col2, growth_col3 = st.columns(3)
-
-with growth_col1:
-    focus_area = "Communication" if avg_manual < 10 else ("Analytical" if avg_mcq < 15 else "Advanced Skills")
-    st.markdown(f"""
-    <div style='text-align: center; padding: 15px; background-color: #e8f4f8; border-radius: 10px;'>
-    <div style='font-size: 24px;'>🎯</div>
-    <h4>Immediate Focus</h4>
-    <p><b>{focus_area}</b><br>Build foundational strength</p>
-    </div>
-    """, unsafe_allow_html=True)
-
-with growth_col2:
-    development_area = "Applied Learning" if avg_likert >= 20 else "Adaptability"
-    st.markdown(f"""
-    <div style='text-align: center; padding: 15px; background-color: #e8f4f8; border-radius: 10px;'>
-    <div style='font-size: 24px;'>🚀</div>
-    <h4>Next Phase</h4>
-    <p><b>{development_area}</b><br>Develop advanced capabilities</p>
-    </div>
-    """, unsafe_allow_html=True)
-
-with growth_col3:
-    mastery_goal = "Balanced Excellence" if strong_areas >= 2 else "Skill Integration"
-    st.markdown(f"""
-    <div style='text-align: center; padding: 15px; background-color: #e8f4f8; border-radius: 10px;'>
-    <div style='font-size: 24px;'>⭐</div>
-    <h4>Long-term Goal</h4>
-    <p><b>{mastery_goal}</b><br>Achieve comprehensive mastery</p>
-    </div>
-    """, unsafe_allow_html=True)
+focus_area = "Communication" if avg_manual < 10 else ("Analytical" if avg_mcq < 15 else "Advanced Skills")
+development_area = "Applied Learning" if avg_likert >= 20 else "Adaptability"
+mastery_goal = "Balanced Excellence" if strong_areas >= 2 else "Skill Integration"
+st.markdown(GROWTH_PATHWAY_TEMPLATE.format(
+    focus_area=focus_area,
+    development_area=development_area,
+    mastery_goal=mastery_goal
+), unsafe_allow_html=True)
 
 # ---------------------------------------------------------
 # EXPORT AND REPORTING
 # ---------------------------------------------------------
 st.header("📥 Export Analytics")
 
+# Gzipped exports are the largest cached values, so only the last few selections are kept
+EXPORT_CACHE_ENTRIES = 4
+
+@st.cache_data(show_spinner=False, max_entries=EXPORT_CACHE_ENTRIES)
+def export_csv_bytes(selection_key, _frame):
+    """Gzipped CSV of the filtered rows, built once per selection"""
+    csv_buffer = io.BytesIO()
+    _frame.to_csv(csv_buffer, index=False, compression='gzip')
+    return csv_buffer.getvalue()
+
 col1, col2 = st.columns(2)
 
 with col1:
     # Summary statistics
     st.subheader("📋 Summary Statistics")
-    summary_stats = filtered_df.groupby('section')['final_total'].agg(['mean', 'median', 'std', 'min', 'max']).round(2)
-    st.dataframe(summary_stats)
+    st.dataframe(insights['summary_stats'])
 
 with col2:
     # Raw data export
     st.subheader("📤 Export Data")
-    if st.button("📊 Download Filtered Data as CSV"):
-        csv = filtered_df.to_csv(index=False)
+    # Built and sent to the browser only once asked for; the checkbox stays ticked across
+    # reruns, and the bytes are cached per selection so unchanged filters reuse them
+    if st.checkbox("Prepare export", key="prepare_export"):
         st.download_button(
-            label="⬇️ Download CSV",
-            data=csv,
-            file_name=f"evaluation_analytics_{datetime.now().strftime('%Y%m%d')}.csv",
-            mime="text/csv"
+            label="⬇️ Download Filtered Data (CSV.gz)",
+            data=export_csv_bytes(selection_key, filtered_df),
+            file_name=f"evaluation_analytics_{datetime.now().strftime('%Y%m%d')}.csv.gz",
+            mime="application/gzip"
         )
@@ -178,7 +178,7 @@ def calculate_auto_scores(df, responses):
     likert_score = 0
     
     q_lookup = {}
-    for _, row in df.iterrows():
+    for row in df.to_dict('records'):
         if 'QuestionID' in row and pd.notna(row['QuestionID']):
             qid_clean = str(row['QuestionID']).strip()
             q_lookup[qid_clean] = row
@@ -246,19 +246,15 @@ def evaluate_manual_questions(df_test, responses, existing_manual_marks=None):
     
     st.subheader("📝 Manual Evaluation - Text Questions")
     
-    for _, row in manual_questions.iterrows():
-        qid = str(row["QuestionID"])
-        qtext = row["Question"]
-        
-        student_answer = "No answer provided"
-        for resp in responses:
-            resp_qid = None
-            if 'QuestionID' in resp:
-                resp_qid = str(resp['QuestionID']).strip()
-            if resp_qid == qid:
-                if 'Response' in resp:
-                    student_answer = str(resp['Response'])
-                break
+    # First response per question ID, so each question is a dict lookup instead of a rescan
+    first_response = {}
+    for resp in responses:
+        if 'QuestionID' in resp:
+            first_response.setdefault(str(resp['QuestionID']).strip(), resp)
+    
+    for qid, qtext in zip(manual_questions["QuestionID"].astype(str), manual_questions["Question"]):
+        resp = first_response.get(qid, {})
+        student_answer = str(resp['Response']) if 'Response' in resp else "No answer provided"
         
         st.write(f"**Q{qid}:** {qtext}")
         st.write(f"**Student's Answer:** {student_answer}")
@@ -408,21 +404,23 @@ st.write("---")
 # DEBUG: VERIFY FIREBASE DATA
 # ---------------------------------------------------------
 with st.expander("🔍 Debug: Verify Current Firebase Data"):
-    try:
-        doc_ref = db.collection("student_responses").document(doc_id)
-        firebase_data = doc_ref.get().to_dict()
-        if firebase_data and 'Evaluation' in firebase_data:
-            st.write("✅ Current Firebase Evaluation Data:")
-            st.json(firebase_data['Evaluation'])
+    # Expander bodies run on every rerun - only pay for the extra read when asked
+    if st.checkbox("Fetch stored evaluation", key="debug_fetch_firebase"):
+        try:
+            doc_ref = db.collection("student_responses").document(doc_id)
+            firebase_data = doc_ref.get().to_dict()
+            if firebase_data and 'Evaluation' in firebase_data:
+                st.write("✅ Current Firebase Evaluation Data:")
+                st.json(firebase_data['Evaluation'])
             
-            # Show data freshness
-            evaluated_at = firebase_data['Evaluation'].get('evaluated_at')
-            if evaluated_at:
-                st.write(f"**Last Saved:** {evaluated_at}")
-        else:
-            st.write("❌ No evaluation data in Firebase")
-    except Exception as e:
-        st.error(f"Debug error: {e}")
+                # Show data freshness
+                evaluated_at = firebase_data['Evaluation'].get('evaluated_at')
+                if evaluated_at:
+                    st.write(f"**Last Saved:** {evaluated_at}")
+            else:
+                st.write("❌ No evaluation data in Firebase")
+        except Exception as e:
+            st.error(f"Debug error: {e}")
 
 # ---------------------------------------------------------
 # SAVE EVALUATION - ENHANCED WITH CACHE CLEARANCE
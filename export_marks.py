@@ -141,18 +141,13 @@ df = df.sort_values(["Roll Number", "Section"])
 # ---------------------------------------------------
 # Only show GRAND TOTAL on first section per Roll
 # ---------------------------------------------------
-clean_rows = []
-prev_roll = None
+# Rows are sorted by roll, so every repeat of a roll is a later section
+repeat_roll = df["Roll Number"].duplicated()
 
-for _, r in df.iterrows():
-    row_copy = r.copy()
-    if row_copy["Roll Number"] == prev_roll:
-        row_copy["Grand Total (All Tests)"] = ""
-    else:
-        prev_roll = row_copy["Roll Number"]
-    clean_rows.append(row_copy)
-
-df_final = pd.DataFrame(clean_rows)
+df_final = df.copy()
+df_final["Grand Total (All Tests)"] = (
+    df_final["Grand Total (All Tests)"].astype(object).mask(repeat_roll, "")
+)
 
 
 # ---------------------------------------------------